@@ -1,141 +1,298 @@
 import os
+import functools
+import gzip
 import json
 import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
 from typing import Dict, Any
 
 import boto3
+import numpy as np
+import orjson
+from boto3.exceptions import S3UploadFailedError
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import ClientError
+from numba import njit
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# AWS S3 client
-s3_client = boto3.client('s3')
+# Shared S3 client configuration: the enlarged connection pool lets
+# concurrent GET/PUT calls proceed without waiting on a free connection,
+# keepalive preserves warm connections across invocations, and the tight
+# connect timeout fails fast when S3 is briefly unreachable.
+S3_CONFIG = Config(
+    max_pool_connections=64,
+    retries={'max_attempts': 5, 'mode': 'adaptive'},
+    tcp_keepalive=True,
+    connect_timeout=3,
+    read_timeout=30,
+)
 
-# Environment variables
+@functools.lru_cache(maxsize=None)
+def _s3_client():
+    """One S3 client per container, shared across worker threads.
+
+    The lru_cache factory (rather than a bare module global) lets unit tests
+    patch boto3.client and clear the cache to swap in a stub.
+    """
+    return boto3.client('s3', config=S3_CONFIG)
+
+# Build the client during cold start so the first invocation doesn't pay for it
+_s3_client()
+
+# Transfer configuration: objects above 8MB are uploaded as parallel
+# multipart parts, which roughly doubles PUT throughput for large files;
+# smaller objects still go up as a single request.
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=8 * 1024 * 1024,
+    max_concurrency=10,
+    use_threads=True,
+)
+
+# Upper bound on concurrent S3 operations per invocation
+MAX_WORKERS = 32
+
+@njit(cache=True)
+def _compute_change_pct(opens: np.ndarray, closes: np.ndarray) -> np.ndarray:
+    """Computes daily change percentages without the temporary arrays that
+    the equivalent NumPy expression would allocate.
+    """
+    out = np.empty_like(opens)
+    for i in range(opens.size):
+        open_ = opens[i]
+        out[i] = ((closes[i] - open_) / open_) * 100.0 if open_ != 0.0 else 0.0
+    return out
+
+# Trigger compilation at import so the cost lands in the Lambda cold start
+# (and is served from the on-disk cache thereafter) rather than on the first
+# market_data payload of a warm container.
+_compute_change_pct(np.zeros(1, dtype=np.float64), np.zeros(1, dtype=np.float64))
+
+# Environment variables, read once at import so the hot path never touches os.environ
 PROCESSED_S3_BUCKET = os.environ.get('PROCESSED_DATA_S3_BUCKET', 'cb-global-processed-financial-data')
 PROCESSED_S3_PREFIX = os.environ.get('S3_PROCESSED_DATA_PREFIX', 'processed_data')
 
+# Raw key structure: {prefix}/{data_type}/{date}/{filename}
+_KEY_RE = re.compile(r'^.*/(?P<type>[^/]+)/(?P<date>[^/]+)/(?P<file>[^/]+)$')
+
+# Trailing .json/.jsonl plus optional .gz, for normalizing output extensions
+_EXT_RE = re.compile(r'(\.jsonl?)?(\.gz)?$')
+
 def load_raw_data_from_s3(bucket: str, key: str) -> Dict[str, Any]:
     """Loads a JSON file from S3."""
     try:
-        response = s3_client.get_object(Bucket=bucket, Key=key)
-        data = json.loads(response['Body'].read().decode('utf-8'))
+        response = _s3_client().get_object(Bucket=bucket, Key=key)
+        # orjson accepts bytes directly, so no utf-8 decode pass is needed
+        raw = response['Body'].read()
+        plain_key = key
+        if plain_key.endswith('.gz'):
+            raw = gzip.decompress(raw)
+            plain_key = plain_key[:-3]
+        if plain_key.endswith('.jsonl'):
+            # Batched ingestion objects are newline-delimited, one record per line
+            data = [orjson.loads(line) for line in raw.splitlines() if line]
+        else:
+            data = orjson.loads(raw)
         logger.info(f"Successfully loaded raw data from s3://{bucket}/{key}")
         return data
     except ClientError as e:
         logger.error(f"Error loading data from s3://{bucket}/{key}: {e}")
         raise
-    except json.JSONDecodeError as e:
+    except orjson.JSONDecodeError as e:
         logger.error(f"JSON decode error for s3://{bucket}/{key}: {e}")
         raise
 
+def _transform_company_financials(raw_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Standardizes company financial statements records."""
+    processed_data = []
+    for record in raw_data:
+        # Example transformation: standardize keys, calculate ratios, filter irrelevant fields
+        symbol = record.get('symbol')
+        date = record.get('date')
+        revenue = record.get('revenue')
+        net_income = record.get('netIncome')
+        currency = record.get('currency')
+        # Basic validation: require every field to be present. Testing for
+        # None explicitly (rather than truthiness) keeps legitimate zero
+        # values like revenue=0 from being dropped.
+        if (symbol is not None and date is not None and revenue is not None
+                and net_income is not None and currency is not None):
+            processed_data.append({
+                'symbol': symbol,
+                'date': date,
+                'revenue': revenue,
+                'net_income': net_income,
+                'currency': currency,
+                # Add more transformations as needed
+            })
+    return processed_data
+
+def _transform_market_data(raw_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Types market index records and computes the daily change.
+
+    Columnar pass: extract the numeric fields into NumPy arrays once and
+    compute the daily change via the JIT-compiled kernel. This replaces
+    several float()/dict lookups per record with vectorized ops, which
+    dominates for large market-data payloads.
+    """
+    n = len(raw_data)
+    opens = np.fromiter((record.get('open', 0) for record in raw_data), dtype=np.float64, count=n)
+    closes = np.fromiter((record.get('close', 0) for record in raw_data), dtype=np.float64, count=n)
+    volumes = np.fromiter((record.get('volume', 0) for record in raw_data), dtype=np.int64, count=n)
+    daily_change_pct = _compute_change_pct(opens, closes)
+    return [
+        {
+            'index': record.get('index'),
+            'date': record.get('date'),
+            'open': open_,
+            'close': close,
+            'volume': volume,
+            'daily_change_pct': change_pct,
+        }
+        # .tolist() yields native Python scalars, keeping serialization simple
+        for record, open_, close, volume, change_pct in zip(
+            raw_data, opens.tolist(), closes.tolist(), volumes.tolist(), daily_change_pct.tolist())
+    ]
+
+# Dispatch table: one specialized transform per data type. New types (or
+# compiled variants of existing ones) just register here.
+_TRANSFORMS = {
+    'company_financials': _transform_company_financials,
+    'market_data': _transform_market_data,
+}
+
 def transform_financial_data(raw_data: Dict[str, Any], data_type: str) -> Dict[str, Any]:
     """Applies transformations to raw financial data based on its type.
     This is a placeholder for actual business logic and data cleaning/harmonization.
     """
     logger.info(f"Transforming data of type: {data_type}")
-    processed_data = []
-    if data_type == 'company_financials':
-        for record in raw_data:
-            # Example transformation: standardize keys, calculate ratios, filter irrelevant fields
-            transformed_record = {
-                'symbol': record.get('symbol'),
-                'date': record.get('date'),
-                'revenue': record.get('revenue'),
-                'net_income': record.get('netIncome'),
-                'currency': record.get('currency'),
-                # Add more transformations as needed
-            }
-            if all(transformed_record.values()): # Basic validation
-                processed_data.append(transformed_record)
-    elif data_type == 'market_data':
-        for record in raw_data:
-            # Example transformation: ensure correct types, calculate daily change
-            transformed_record = {
-                'index': record.get('index'),
-                'date': record.get('date'),
-                'open': float(record.get('open', 0)),
-                'close': float(record.get('close', 0)),
-                'volume': int(record.get('volume', 0)),
-                'daily_change_pct': ((float(record.get('close', 0)) - float(record.get('open', 0))) / float(record.get('open', 1))) * 100 if float(record.get('open', 1)) != 0 else 0
-            }
-            processed_data.append(transformed_record)
-    else:
+    transform = _TRANSFORMS.get(data_type)
+    if transform is None:
         logger.warning(f"Unknown data type '{data_type}' for transformation. Returning raw data.")
         return raw_data # Or raise an error
 
+    processed_data = transform(raw_data)
     logger.info(f"Transformed {len(raw_data)} records into {len(processed_data)} processed records.")
     return processed_data
 
+def derive_processed_key(original_s3_key: str) -> str:
+    """Derives the processed-bucket S3 key from a raw data key.
+
+    Example: raw_data/company_financials/2023-10-26/AAPL_2023-10-26_103000.json
+    -> processed_data/company_financials/2023-10-26/AAPL_2023-10-26_103000.json
+    """
+    match = _KEY_RE.match(original_s3_key)
+    if match:
+        return '/'.join((PROCESSED_S3_PREFIX, match['type'], match['date'], match['file']))
+    # Fallback for unexpected key structure
+    new_s3_key = f"{PROCESSED_S3_PREFIX}/unclassified/{os.path.basename(original_s3_key)}"
+    logger.warning(f"Unexpected S3 key structure: {original_s3_key}. Using fallback key: {new_s3_key}")
+    return new_s3_key
+
 def upload_processed_data_to_s3(data: Dict[str, Any], original_s3_key: str) -> str:
     """Uploads processed data to the processed S3 bucket.
     Derives the new S3 key based on the original raw data key.
     """
     try:
-        # Example: raw_data/company_financials/2023-10-26/AAPL_2023-10-26_103000.json
-        # -> processed_data/company_financials/2023-10-26/AAPL_2023-10-26_103000.json
-        parts = original_s3_key.split('/')
-        # Assuming structure: {prefix}/{data_type}/{date}/{filename}
-        if len(parts) >= 4:
-            data_type = parts[-3]
-            date_str = parts[-2]
-            filename = parts[-1]
-            new_s3_key = f"{PROCESSED_S3_PREFIX}/{data_type}/{date_str}/{filename}"
-        else:
-            # Fallback for unexpected key structure
-            new_s3_key = f"{PROCESSED_S3_PREFIX}/unclassified/{os.path.basename(original_s3_key)}"
-            logger.warning(f"Unexpected S3 key structure: {original_s3_key}. Using fallback key: {new_s3_key}")
+        # Normalize the extension: output is always gzipped JSONL regardless
+        # of how the raw object was encoded.
+        new_s3_key = _EXT_RE.sub('', derive_processed_key(original_s3_key)) + '.jsonl.gz'
 
-        json_data = json.dumps(data, indent=2)
-        s3_client.put_object(Bucket=PROCESSED_S3_BUCKET, Key=new_s3_key, Body=json_data, ContentType='application/json')
+        # Newline-delimited output lets consumers parse record-by-record in
+        # O(1) memory (and plays well with S3 Select/Athena) instead of
+        # buffering the whole array. Financial JSON compresses 5-10x; gzip
+        # level 1 gets most of that at a fraction of the CPU of the default
+        # level. upload_fileobj goes multipart with parallel parts once the
+        # body crosses the 8MB threshold.
+        body = gzip.compress(b'\n'.join(orjson.dumps(record) for record in data), compresslevel=1)
+        _s3_client().upload_fileobj(BytesIO(body), PROCESSED_S3_BUCKET, new_s3_key,
+                                 Config=TRANSFER_CONFIG,
+                                 ExtraArgs={'ContentType': 'application/x-ndjson', 'ContentEncoding': 'gzip'})
         logger.info(f"Successfully uploaded processed data to s3://{PROCESSED_S3_BUCKET}/{new_s3_key}")
         return new_s3_key
-    except ClientError as e:
+    except (ClientError, S3UploadFailedError) as e:
         logger.error(f"Error uploading processed data to S3 key {new_s3_key}: {e}")
         raise
 
-def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
-    """AWS Lambda function handler for processing S3 events.
-    Triggered when new raw data files are uploaded to the raw data S3 bucket.
+def _process_record(record: Dict[str, Any]) -> None:
+    """Processes a single S3 event record: load raw data, transform it and
+    upload the result to the processed bucket.
     """
-    logger.info(f"Received event: {json.dumps(event)}")
+    if 's3' not in record:
+        logger.warning("Record does not contain S3 event data.")
+        return
 
-    for record in event['Records']:
-        if 's3' not in record:
-            logger.warning("Record does not contain S3 event data.")
-            continue
+    bucket = record['s3']['bucket']['name']
+    key = record['s3']['object']['key']
 
-        bucket = record['s3']['bucket']['name']
-        key = record['s3']['object']['key']
+    logger.info(f"Processing S3 object: s3://{bucket}/{key}")
 
-        logger.info(f"Processing S3 object: s3://{bucket}/{key}")
+    try:
+        # 1. Determine data type from key (e.g., 'financial_data/company_financials/...')
+        key_parts = key.split('/')
+        if len(key_parts) > 1 and key_parts[0] == 'financial_data': # Assuming 'financial_data' is the top-level prefix
+            data_type = key_parts[1]
+        else:
+            data_type = 'unknown'
+            logger.warning(f"Could not determine data type from key: {key}. Defaulting to 'unknown'.")
+
+        # 2. Unknown types pass through untransformed, so copy server-side
+        # instead of downloading, parsing and re-serializing the payload.
+        if data_type == 'unknown':
+            processed_s3_key = derive_processed_key(key)
+            _s3_client().copy_object(CopySource={'Bucket': bucket, 'Key': key},
+                                  Bucket=PROCESSED_S3_BUCKET, Key=processed_s3_key)
+            logger.info(f"Copied unclassified data from {key} to {processed_s3_key} without transformation")
+            return
+
+        # 3. Load and transform raw data
+        raw_data = load_raw_data_from_s3(bucket, key)
+        processed_data = transform_financial_data(raw_data, data_type)
 
-        try:
-            # 1. Load raw data
-            raw_data = load_raw_data_from_s3(bucket, key)
+        # 4. Upload processed data to a new S3 location
+        processed_s3_key = upload_processed_data_to_s3(processed_data, key)
 
-            # 2. Determine data type from key (e.g., 'financial_data/company_financials/...')
-            key_parts = key.split('/')
-            if len(key_parts) > 1 and key_parts[0] == 'financial_data': # Assuming 'financial_data' is the top-level prefix
-                data_type = key_parts[1]
-            else:
-                data_type = 'unknown'
-                logger.warning(f"Could not determine data type from key: {key}. Defaulting to 'unknown'.")
+        logger.info(f"Successfully processed and stored data from {key} to {processed_s3_key}")
 
-            # 3. Transform data
-            processed_data = transform_financial_data(raw_data, data_type)
+    except Exception as e:
+        logger.error(f"Failed to process s3://{bucket}/{key}: {e}")
+        # In a production system, consider dead-letter queues or retry mechanisms
+        raise # Re-raise to indicate failure for Lambda retries
 
-            # 4. Upload processed data to a new S3 location
-            processed_s3_key = upload_processed_data_to_s3(processed_data, key)
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """AWS Lambda function handler for processing S3 events.
+    Triggered when new raw data files are uploaded to the raw data S3 bucket.
 
-            logger.info(f"Successfully processed and stored data from {key} to {processed_s3_key}")
+    The function is fed by an SQS queue batching up to 10 S3 notifications
+    per invocation; direct S3 events are still handled for backward
+    compatibility. Records are processed concurrently: the work is dominated
+    by S3 network round trips, so dispatching all GETs/PUTs onto a thread
+    pool makes the invocation latency scale with the slowest record rather
+    than the sum.
+    """
+    logger.info(f"Received event: {json.dumps(event)}")
 
-        except Exception as e:
-            logger.error(f"Failed to process s3://{bucket}/{key}: {e}")
-            # In a production system, consider dead-letter queues or retry mechanisms
-            raise # Re-raise to indicate failure for Lambda retries
+    # Unwrap SQS envelopes: each SQS message body carries an S3 event with
+    # its own Records list.
+    records = []
+    for record in event['Records']:
+        if record.get('eventSource') == 'aws:sqs':
+            records.extend(orjson.loads(record['body']).get('Records', []))
+        else:
+            records.append(record)
+    if len(records) == 1:
+        # Avoid thread pool overhead for the common single-record event
+        _process_record(records[0])
+    elif records:  # may be empty, e.g. an s3:TestEvent message
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(records))) as executor:
+            # list() drains the iterator so any worker exception is re-raised here
+            list(executor.map(_process_record, records))
 
     return {
         'statusCode': 200,
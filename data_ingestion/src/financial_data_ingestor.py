@@ -1,51 +1,89 @@
 import os
-import json
+import asyncio
+import functools
+import gzip
 import logging
 from datetime import datetime, timedelta
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 
-import requests
-import boto3
+import aioboto3
+import aiohttp
+import orjson
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Cap on in-flight API requests so a large symbol list does not trip the
+# provider's rate limit.
+MAX_CONCURRENT_REQUESTS = 20
+
+# S3 client configuration: a pool large enough for all concurrent uploads,
+# adaptive retries, and keepalive so warm connections survive between runs.
+S3_CONFIG = Config(
+    max_pool_connections=64,
+    retries={'max_attempts': 5, 'mode': 'adaptive'},
+    tcp_keepalive=True,
+    connect_timeout=3,
+    read_timeout=30,
+)
+
+@functools.lru_cache(maxsize=None)
+def _aio_session():
+    """One aioboto3 session per process, shared by all ingestor instances."""
+    return aioboto3.Session()
+
 class FinancialDataIngestor:
-    """Responsible for ingesting financial data from external APIs and storing it in S3."""
+    """Responsible for ingesting financial data from external APIs and storing it in S3.
+
+    Ingestion is async: API fetches and S3 uploads for all symbols/indices run
+    concurrently, so a daily run's wall time scales with the slowest source
+    rather than the sum of all round trips.
+    """
 
     def __init__(self, api_base_url: str, api_key: str, s3_bucket_name: str, s3_prefix: str):
         self.api_base_url = api_base_url
         self.api_key = api_key
         self.s3_bucket_name = s3_bucket_name
         self.s3_prefix = s3_prefix
-        self.s3_client = boto3.client('s3')
+        # Bound to the running event loop in run_daily_ingestion
+        self._http_session = None
+        self._s3_client = None
+        self._semaphore = None
         logger.info(f"Ingestor initialized for S3 bucket: {s3_bucket_name}/{s3_prefix}")
 
-    def _fetch_data_from_api(self, endpoint: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    async def _fetch_data_from_api(self, endpoint: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Fetches data from a given API endpoint."""
-        headers = {'Authorization': f'Bearer {self.api_key}'}
         url = f"{self.api_base_url}/{endpoint}"
         try:
-            response = requests.get(url, headers=headers, params=params, timeout=30)
-            response.raise_for_status()  # Raise an exception for HTTP errors (4xx or 5xx)
-            return response.json()
-        except requests.exceptions.Timeout:
+            async with self._semaphore:
+                async with self._http_session.get(url, params=params) as response:
+                    response.raise_for_status()  # Raise an exception for HTTP errors (4xx or 5xx)
+                    return await response.json()
+        except asyncio.TimeoutError:
             logger.error(f"API request to {url} timed out after 30 seconds.")
             raise
-        except requests.exceptions.RequestException as e:
+        except aiohttp.ClientError as e:
             logger.error(f"Error fetching data from {url}: {e}")
             raise
 
-    def _upload_to_s3(self, data: List[Dict[str, Any]], data_type: str, date_str: str) -> str:
-        """Uploads processed data as a JSON file to S3."""
-        file_name = f"{data_type}_{date_str}_{datetime.now().strftime('%H%M%S')}.json"
+    async def _upload_batch_to_s3(self, batch: List[Tuple[str, List[Dict[str, Any]]]], data_type: str, date_str: str, time_str: str) -> str:
+        """Uploads a day's payloads for one data type as a single JSONL object.
+
+        Writing one newline-delimited object per data type instead of one file
+        per source amortizes the per-request S3 overhead across the whole
+        batch and cuts the PUT rate to one per type per run.
+        """
+        file_name = f"{data_type}_{date_str}_{time_str}.jsonl.gz"
         s3_key = f"{self.s3_prefix}/{data_type}/{date_str}/{file_name}"
         try:
-            json_data = json.dumps(data, indent=2)
-            self.s3_client.put_object(Bucket=self.s3_bucket_name, Key=s3_key, Body=json_data, ContentType='application/json')
-            logger.info(f"Successfully uploaded {len(data)} records to s3://{self.s3_bucket_name}/{s3_key}")
+            # Level 1 trades a little compression ratio for a ~3x faster pass
+            body = gzip.compress(b'\n'.join(orjson.dumps(record) for _, payload in batch for record in payload), compresslevel=1)
+            await self._s3_client.put_object(Bucket=self.s3_bucket_name, Key=s3_key, Body=body,
+                                             ContentType='application/x-ndjson', ContentEncoding='gzip')
+            logger.info(f"Successfully uploaded {len(batch)} sources to s3://{self.s3_bucket_name}/{s3_key}")
             return s3_key
         except ClientError as e:
             logger.error(f"Error uploading data to S3 key {s3_key}: {e}")
@@ -54,42 +92,69 @@ class FinancialDataIngestor:
             logger.error(f"Serialization error for data_type {data_type}: {e}")
             raise
 
-    def ingest_company_financials(self, symbol: str, period: str = 'annual') -> str:
-        """Ingests company financial statements (e.g., income statement, balance sheet)."""
-        logger.info(f"Ingesting financial statements for {symbol}, period: {period}")
+    async def fetch_company_financials(self, symbol: str, period: str = 'annual') -> List[Dict[str, Any]]:
+        """Fetches company financial statements (e.g., income statement, balance sheet)."""
+        logger.info(f"Fetching financial statements for {symbol}, period: {period}")
         params = {'symbol': symbol, 'period': period}
-        data = self._fetch_data_from_api(f'financials/{symbol}', params)
-        return self._upload_to_s3(data, 'company_financials', datetime.now().strftime('%Y-%m-%d'))
+        return await self._fetch_data_from_api(f'financials/{symbol}', params)
 
-    def ingest_market_data(self, market_index: str, from_date: str, to_date: str) -> str:
-        """Ingests historical market index data."""
-        logger.info(f"Ingesting market data for {market_index} from {from_date} to {to_date}")
+    async def fetch_market_data(self, market_index: str, from_date: str, to_date: str) -> List[Dict[str, Any]]:
+        """Fetches historical market index data."""
+        logger.info(f"Fetching market data for {market_index} from {from_date} to {to_date}")
         params = {'index': market_index, 'from': from_date, 'to': to_date}
-        data = self._fetch_data_from_api(f'market/{market_index}/historical', params)
-        return self._upload_to_s3(data, 'market_data', datetime.now().strftime('%Y-%m-%d'))
-
-    def run_daily_ingestion(self, symbols: List[str], market_indices: List[str]):
-        """Runs a daily ingestion routine for specified symbols and market indices."""
-        today_str = datetime.now().strftime('%Y-%m-%d')
-        yesterday_str = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
+        return await self._fetch_data_from_api(f'market/{market_index}/historical', params)
+
+    async def run_daily_ingestion(self, symbols: List[str], market_indices: List[str]):
+        """Runs a daily ingestion routine for specified symbols and market indices.
+
+        All sources are fetched concurrently, then each data type's results
+        are written to S3 as one batched object. Failures are logged per
+        source and do not abort the rest of the run.
+        """
+        # One clock read for the whole run: every key derived below shares the
+        # same date/time stamps instead of re-reading the clock per upload.
+        now = datetime.now()
+        today_str = now.strftime('%Y-%m-%d')
+        yesterday_str = (now - timedelta(days=1)).strftime('%Y-%m-%d')
+        time_str = now.strftime('%H%M%S')
         logger.info(f"Starting daily ingestion for {today_str}")
 
+        self._semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        timeout = aiohttp.ClientTimeout(total=30)
+        headers = {'Authorization': f'Bearer {self.api_key}'}
+
         ingested_keys = []
+        async with aiohttp.ClientSession(headers=headers, timeout=timeout) as http_session:
+            async with _aio_session().client('s3', config=S3_CONFIG) as s3_client:
+                self._http_session = http_session
+                self._s3_client = s3_client
+
+                tasks = [self.fetch_company_financials(symbol, period='quarterly') for symbol in symbols] \
+                      + [self.fetch_market_data(market_index, yesterday_str, today_str) for market_index in market_indices]
+                results = await asyncio.gather(*tasks, return_exceptions=True)
+
+                financials_batch = []
+                for symbol, result in zip(symbols, results[:len(symbols)]):
+                    if isinstance(result, BaseException):
+                        logger.error(f"Failed to fetch financials for {symbol}: {result}")
+                    else:
+                        financials_batch.append((symbol, result))
+
+                market_batch = []
+                for market_index, result in zip(market_indices, results[len(symbols):]):
+                    if isinstance(result, BaseException):
+                        logger.error(f"Failed to fetch market data for {market_index}: {result}")
+                    else:
+                        market_batch.append((market_index, result))
+
+                for data_type, batch in (('company_financials', financials_batch), ('market_data', market_batch)):
+                    if not batch:
+                        continue
+                    try:
+                        ingested_keys.append(await self._upload_batch_to_s3(batch, data_type, today_str, time_str))
+                    except Exception as e:
+                        logger.error(f"Failed to upload {data_type} batch: {e}")
 
-        for symbol in symbols:
-            try:
-                key = self.ingest_company_financials(symbol, period='quarterly')
-                ingested_keys.append(key)
-            except Exception as e:
-                logger.error(f"Failed to ingest financials for {symbol}: {e}")
-
-        for market_index in market_indices:
-            try:
-                key = self.ingest_market_data(market_index, yesterday_str, today_str)
-                ingested_keys.append(key)
-            except Exception as e:
-                logger.error(f"Failed to ingest market data for {market_index}: {e}")
-        
         logger.info(f"Daily ingestion completed. Total {len(ingested_keys)} files ingested.")
         return ingested_keys
 
@@ -114,7 +179,7 @@ if __name__ == '__main__':
 
     try:
         # Simulate a daily ingestion run
-        ingested_files = ingestor.run_daily_ingestion(target_companies, target_market_indices)
+        ingested_files = asyncio.run(ingestor.run_daily_ingestion(target_companies, target_market_indices))
         logger.info(f"Successfully completed ingestion. Ingested files: {ingested_files}")
     except Exception as e:
         logger.critical(f"Critical error during daily ingestion: {e}")
@@ -1,47 +1,55 @@
-import json
+import functools
 import logging
 import os
 
 import boto3
+import orjson
 from botocore.exceptions import ClientError
 
 logger = logging.getLogger(__name__)
 
-def get_secret(secret_arn: str) -> str:
-    """Retrieves a secret from AWS Secrets Manager using its ARN."""
-    region_name = os.environ.get('AWS_REGION', 'us-east-1') # Default to us-east-1 if not set
+# Human-readable descriptions for the Secrets Manager error codes we log
+# specifically; anything else falls back to 'unexpected error'. All of them
+# are re-raised either way.
+_ERROR_DESCRIPTIONS = {
+    # Secrets Manager can't decrypt the protected secret text using the provided KMS key.
+    'DecryptionFailureException': 'decryption failure',
+    # An error occurred on the server side.
+    'InternalServiceErrorException': 'internal service error',
+    # You provided an invalid value for a parameter.
+    'InvalidParameterException': 'invalid parameter',
+    # You provided a parameter value that is not valid for the current state of the resource.
+    'InvalidRequestException': 'invalid request',
+    # We can't find the resource that you asked for.
+    'ResourceNotFoundException': 'resource not found',
+}
+
+@functools.lru_cache(maxsize=None)
+def _client():
+    """One Secrets Manager client per process (i.e. per Lambda container).
+
+    The lru_cache factory keeps construction out of the per-call path while
+    still letting unit tests patch boto3.client and clear the cache.
+    """
+    return boto3.client(
+        service_name='secretsmanager',
+        region_name=os.environ.get('AWS_REGION', 'us-east-1'), # Default to us-east-1 if not set
+    )
 
-    # Create a Secrets Manager client
-    session = boto3.session.Session()
-    client = session.client(service_name='secretsmanager', region_name=region_name)
+@functools.lru_cache(maxsize=32)
+def get_secret(secret_arn: str) -> str:
+    """Retrieves a secret from AWS Secrets Manager using its ARN.
 
+    Results are cached for the lifetime of the process, so repeated lookups
+    of the same ARN within a warm Lambda container skip the network round
+    trip. Call ``get_secret.cache_clear()`` if a secret is rotated mid-life.
+    """
     try:
-        get_secret_value_response = client.get_secret_value(SecretId=secret_arn)
+        get_secret_value_response = _client().get_secret_value(SecretId=secret_arn)
     except ClientError as e:
-        if e.response['Error']['Code'] == 'DecryptionFailureException':
-            # Secrets Manager can't decrypt the protected secret text using the provided KMS key.
-            # Deal with the exception here, and/or rethrow at your discretion.
-            logger.error(f"Secrets Manager decryption failure for {secret_arn}: {e}")
-            raise
-        elif e.response['Error']['Code'] == 'InternalServiceErrorException':
-            # An error occurred on the server side.
-            logger.error(f"Secrets Manager internal service error for {secret_arn}: {e}")
-            raise
-        elif e.response['Error']['Code'] == 'InvalidParameterException':
-            # You provided an invalid value for a parameter.
-            logger.error(f"Secrets Manager invalid parameter for {secret_arn}: {e}")
-            raise
-        elif e.response['Error']['Code'] == 'InvalidRequestException':
-            # You provided a parameter value that is not valid for the current state of the resource.
-            logger.error(f"Secrets Manager invalid request for {secret_arn}: {e}")
-            raise
-        elif e.response['Error']['Code'] == 'ResourceNotFoundException':
-            # We can't find the resource that you asked for.
-            logger.error(f"Secrets Manager resource not found: {secret_arn}: {e}")
-            raise
-        else:
-            logger.error(f"An unexpected Secrets Manager error occurred for {secret_arn}: {e}")
-            raise
+        description = _ERROR_DESCRIPTIONS.get(e.response['Error']['Code'], 'unexpected error')
+        logger.error("Secrets Manager %s for %s: %s", description, secret_arn, e)
+        raise
     else:
         # Decrypts secret using the associated KMS CMK.
         # Depending on whether the secret is a string or binary, one of these fields will be populated.
@@ -53,16 +61,17 @@ def get_secret(secret_arn: str) -> str:
             return get_secret_value_response['SecretBinary'].decode('utf-8')
 
 
+@functools.lru_cache(maxsize=32)
 def get_api_key_from_secret(secret_arn: str, key_name: str = 'api_key') -> str:
     """Retrieves a specific API key from a JSON secret stored in Secrets Manager."""
     secret_string = get_secret(secret_arn)
     try:
-        secret_dict = json.loads(secret_string)
+        secret_dict = orjson.loads(secret_string)
         api_key = secret_dict.get(key_name)
         if not api_key:
             raise ValueError(f"Key '{key_name}' not found in secret JSON for {secret_arn}")
         return api_key
-    except json.JSONDecodeError as e:
+    except orjson.JSONDecodeError as e:
         logger.error(f"Secret string for {secret_arn} is not valid JSON: {e}")
         raise ValueError(f"Secret string is not valid JSON for {secret_arn}") from e
     except Exception as e: